@@ -2,18 +2,30 @@
 from __future__ import annotations
 
 import logging
-from typing import Final
+from typing import Any, Final
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant, ServiceCall
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
+from .attachment import AttachmentUploader
+from .broadcast import BROADCAST_SCHEMA, SERVICE_BROADCAST, async_handle_broadcast
 from .const import (
+    CONF_BLOSSOM_SERVER,
+    CONF_ISOLATED_WORKER,
+    CONF_RECIPIENT_RELAYS,
+    CONF_RECIPIENTS,
+    CONF_TOPIC_NAME,
     DEFAULT_BOOTSTRAP_RELAYS,
     DISCOVERY_TIMEOUT_SEC,
     DOMAIN,
 )
+from .lifecycle import NostrLifecycle
 from .nostr_client import NostrClient
+from .util import normalize_relay_urls, parse_stored_relays
+from .worker import NostrWorkerClient
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +33,20 @@ PLATFORMS: Final = [Platform.NOTIFY]
 
 RELAY_CACHE_TTL_SEC = 3600
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the domain-level services."""
+
+    async def _async_broadcast(call: ServiceCall) -> None:
+        await async_handle_broadcast(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BROADCAST, _async_broadcast, schema=BROADCAST_SCHEMA
+    )
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Nostr notifier from a config entry."""
@@ -28,17 +54,51 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.data.setdefault(DOMAIN, {})
     private_key = entry.data.get("private_key")
-    client = NostrClient(private_key)
-    hass.data[DOMAIN][entry.entry_id] = {"entry": entry, "client": client}
+    isolated_worker = entry.options.get(CONF_ISOLATED_WORKER, False)
+    client: NostrClient | NostrWorkerClient
+    if isolated_worker:
+        client = NostrWorkerClient(hass, private_key, entry.title)
+        await client.async_start()
+    else:
+        client = NostrClient(private_key)
+    # Inbox relays resolved by the config/options flow
+    client.seed_relay_cache(
+        parse_stored_relays(
+            entry.options.get(CONF_RECIPIENT_RELAYS, entry.data.get(CONF_RECIPIENT_RELAYS, {}))
+        )
+    )
+    lifecycle = NostrLifecycle(hass, client, entry.title)
+    uploader = AttachmentUploader(
+        hass, private_key, entry.options.get(CONF_BLOSSOM_SERVER)
+    )
+    topic_name = entry.options.get(CONF_TOPIC_NAME, entry.data.get(CONF_TOPIC_NAME, "Unknown"))
+    recipients_hex = entry.options.get(CONF_RECIPIENTS, entry.data.get(CONF_RECIPIENTS, []))
+    hass.data[DOMAIN][entry.entry_id] = entry_data = {
+        "entry": entry,
+        "client": client,
+        "lifecycle": lifecycle,
+        "uploader": uploader,
+        CONF_ISOLATED_WORKER: isolated_worker,
+        CONF_TOPIC_NAME: topic_name,
+        CONF_RECIPIENTS: list(recipients_hex),
+    }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Publish metadata after entry setup (fire-and-forget with HA lifecycle integration)
-    hass.async_create_background_task(
-        _publish_topic_metadata(hass, entry, client),
-        name=f"nostr_metadata_publish_{entry.entry_id}",
+    # Apply option changes in place instead of reloading the entry
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    async def _async_handle_stop(event: Event) -> None:
+        """Drain deliveries and disconnect relays when Home Assistant stops."""
+        await lifecycle.async_shutdown()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_handle_stop)
     )
 
+    # Publish metadata after entry setup (fire-and-forget, cancelled on unload/stop)
+    _async_start_metadata_publish(entry, entry_data, topic_name, recipients_hex, recipients_hex)
+
     return True
 
 
@@ -47,27 +107,117 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.info("Unloading Nostr notifier integration for entry: %s", entry.title)
 
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        lifecycle: NostrLifecycle = entry_data["lifecycle"]
+        await lifecycle.async_shutdown()
 
     return unload_ok
 
 
-async def _publish_topic_metadata(
-    hass: HomeAssistant,
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Hot-apply topic name and recipient changes to the running entry.
+
+    The client, its relay connections and its discovery cache are kept.
+    Only recipients that were added are resolved; removed ones are dropped.
+    """
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+
+    # Switching delivery mode needs a new client, which a reload provides
+    if entry.options.get(CONF_ISOLATED_WORKER, False) != entry_data[CONF_ISOLATED_WORKER]:
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+        return
+
+    client: NostrClient | NostrWorkerClient = entry_data["client"]
+    uploader: AttachmentUploader = entry_data["uploader"]
+    uploader.server_url = entry.options.get(CONF_BLOSSOM_SERVER)
+
+    topic_name = entry.options.get(CONF_TOPIC_NAME, entry.data.get(CONF_TOPIC_NAME, "Unknown"))
+    recipients_hex = list(
+        entry.options.get(CONF_RECIPIENTS, entry.data.get(CONF_RECIPIENTS, []))
+    )
+
+    previous_topic_name = entry_data[CONF_TOPIC_NAME]
+    previous_recipients = set(entry_data[CONF_RECIPIENTS])
+    added = [r for r in recipients_hex if r not in previous_recipients]
+    removed = previous_recipients.difference(recipients_hex)
+
+    if topic_name == previous_topic_name and not added and not removed:
+        return
+
+    _LOGGER.info(
+        "Applying options for topic %s: %d recipient(s) added, %d removed",
+        topic_name,
+        len(added),
+        len(removed),
+    )
+
+    entry_data[CONF_TOPIC_NAME] = topic_name
+    entry_data[CONF_RECIPIENTS] = recipients_hex
+
+    if removed:
+        await client.forget_recipients(list(removed))
+
+    recipient_relays = parse_stored_relays(entry.options.get(CONF_RECIPIENT_RELAYS, {}))
+    client.seed_relay_cache({r: recipient_relays[r] for r in added if r in recipient_relays})
+
+    if entity := entry_data.get("entity"):
+        entity.async_update_topic(topic_name, recipients_hex)
+
+    # Removing recipients does not change what the topic profile looks like
+    if topic_name != previous_topic_name or added:
+        _async_start_metadata_publish(entry, entry_data, topic_name, recipients_hex, added)
+
+
+def _async_start_metadata_publish(
     entry: ConfigEntry,
-    client: NostrClient,
+    entry_data: dict[str, Any],
+    topic_name: str,
+    recipients_hex: list[str],
+    resolve_hex: list[str],
 ) -> None:
-    """Publish topic metadata (kind 0) to bootstrap and recipient relays."""
-    topic_name = entry.options.get("topic_name", entry.data.get("topic_name", "Unknown"))
+    """Start a metadata publish, replacing one that is still running.
+
+    Recipients the replaced task had not resolved yet are resolved by the new one.
+    """
+    resolve = list(resolve_hex)
+    if previous := entry_data.get("metadata_publish"):
+        previous_task, previous_resolve = previous
+        if not previous_task.done():
+            previous_task.cancel()
+            resolve.extend(
+                r for r in previous_resolve if r in recipients_hex and r not in resolve
+            )
+
+    lifecycle: NostrLifecycle = entry_data["lifecycle"]
+    task = lifecycle.async_create_background_task(
+        _publish_topic_metadata(entry_data["client"], topic_name, recipients_hex, resolve),
+        name=f"nostr_metadata_publish_{entry.entry_id}",
+    )
+    entry_data["metadata_publish"] = (task, resolve) if task is not None else None
 
-    relays = list(DEFAULT_BOOTSTRAP_RELAYS)
-    recipients_hex = entry.options.get("recipients", entry.data.get("recipients", []))
 
-    for recipient_hex in recipients_hex:
-        recipient_relays = await client.discover_recipient_relays(recipient_hex)
-        for relay in recipient_relays:
-            if relay not in relays:
-                relays.append(relay)
+async def _publish_topic_metadata(
+    client: NostrClient | NostrWorkerClient,
+    topic_name: str,
+    recipients_hex: list[str],
+    resolve_hex: list[str],
+) -> None:
+    """Publish topic metadata (kind 0) to bootstrap and recipient relays.
+
+    Only `resolve_hex` is discovered, in one batched query; the relays of
+    the other recipients come from the client's cache.
+    """
+    candidates = list(DEFAULT_BOOTSTRAP_RELAYS)
+
+    resolve = set(resolve_hex)
+    cached = await client.cached_recipient_relays(
+        [r for r in recipients_hex if r not in resolve]
+    )
+    discovered = await client.discover_recipients_relays(resolve_hex) if resolve_hex else {}
+    for relays in (*cached.values(), *discovered.values()):
+        candidates.extend(relays)
+
+    relays = normalize_relay_urls(candidates)
 
     if relays:
         await client.publish_metadata_event(topic_name, relays)
@@ -0,0 +1,305 @@
+"""Encrypted file attachments for NIP-17 file messages (kind 15).
+
+A file is encrypted once with a random AES-GCM key, uploaded to a
+Blossom-compatible server and then referenced by hash in each recipient's
+gift-wrapped kind 15 message. Hashing, encryption and upload all stream the
+file in fixed-size chunks, and uploads are cached by the hash of the original
+content and server so the same snapshot is only uploaded once.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import secrets
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from .const import ATTACHMENT_CACHE_TTL_SEC, UPLOAD_TIMEOUT_SEC
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_BLOSSOM_AUTH = 24242
+
+CHUNK_SIZE = 64 * 1024
+AES_KEY_SIZE = 32
+AES_GCM_NONCE_SIZE = 12
+BLOSSOM_AUTH_EXPIRATION_SEC = 300
+
+
+@dataclass(frozen=True)
+class EncryptedFile:
+    """An encrypted, uploaded file as referenced by a kind 15 message."""
+
+    url: str
+    sha256: str
+    original_sha256: str
+    size: int
+    mime_type: str
+    key_hex: str
+    nonce_hex: str
+
+
+def _hash_file(path: str) -> str:
+    """Return the SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as src:
+        while chunk := src.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encrypt_file(path: str, key: bytes, nonce: bytes) -> tuple[str, str, int]:
+    """Encrypt a file with AES-GCM into a temporary file, in chunks.
+
+    The authentication tag is appended to the ciphertext, matching the
+    Web Crypto layout NIP-17 clients expect.
+    Returns (encrypted_path, encrypted_sha256, encrypted_size).
+    """
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce)).encryptor()
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, encrypted_path = tempfile.mkstemp(prefix="nostr_attachment_")
+    try:
+        with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                data = encryptor.update(chunk)
+                digest.update(data)
+                dst.write(data)
+                size += len(data)
+            data = encryptor.finalize() + encryptor.tag
+            digest.update(data)
+            dst.write(data)
+            size += len(data)
+    except BaseException:
+        os.unlink(encrypted_path)
+        raise
+
+    return encrypted_path, digest.hexdigest(), size
+
+
+def _write_temp_file(content: bytes) -> str:
+    """Write in-memory content (e.g. a camera snapshot) to a temporary file."""
+    fd, path = tempfile.mkstemp(prefix="nostr_snapshot_")
+    with os.fdopen(fd, "wb") as dst:
+        dst.write(content)
+    return path
+
+
+def _remove_file(path: str) -> None:
+    """Remove a temporary file, ignoring errors."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+async def async_put_blob(
+    session: aiohttp.ClientSession,
+    server_url: str,
+    authorization: str,
+    blob: Any,
+    sha256: str,
+    size: int,
+) -> str | None:
+    """Stream an open encrypted blob to a Blossom server, returning its URL."""
+    server_url = server_url.rstrip("/")
+    upload_url = f"{server_url}/upload"
+    headers = {
+        "Authorization": authorization,
+        "Content-Type": "application/octet-stream",
+        "Content-Length": str(size),
+    }
+
+    # aiohttp streams file objects in chunks without loading them
+    async with session.put(
+        upload_url,
+        data=blob,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(total=UPLOAD_TIMEOUT_SEC),
+    ) as response:
+        if response.status >= 400:
+            _LOGGER.warning(
+                "Blossom upload to %s failed with HTTP %d: %s",
+                upload_url,
+                response.status,
+                response.headers.get("X-Reason", ""),
+            )
+            return None
+        descriptor: dict[str, Any] = await response.json(content_type=None)
+
+    if descriptor.get("sha256", sha256) != sha256:
+        _LOGGER.warning("Blossom server returned a different hash for %s", sha256)
+        return None
+    return descriptor.get("url") or f"{server_url}/{sha256}"
+
+
+def build_blossom_auth(private_key_hex: str, sha256_hex: str) -> str:
+    """Build the Authorization header for a Blossom upload (kind 24242)."""
+    from nostr_sdk import EventBuilder, Keys, Kind, Tag
+
+    keys = Keys.parse(private_key_hex)
+    expiration = int(time.time()) + BLOSSOM_AUTH_EXPIRATION_SEC
+    event = (
+        EventBuilder(Kind(KIND_BLOSSOM_AUTH), "Upload notification attachment")
+        .tags(
+            [
+                Tag.parse(["t", "upload"]),
+                Tag.parse(["x", sha256_hex]),
+                Tag.parse(["expiration", str(expiration)]),
+            ]
+        )
+        .sign_with_keys(keys)
+    )
+    token = base64.b64encode(event.as_json().encode()).decode()
+    return f"Nostr {token}"
+
+
+class AttachmentUploader:
+    """Encrypt and upload attachments to a Blossom server with a content cache."""
+
+    def __init__(
+        self, hass: HomeAssistant, private_key_hex: str, server_url: str | None
+    ) -> None:
+        """Initialize the uploader."""
+        self._hass = hass
+        self._private_key_hex = private_key_hex
+        self.server_url = server_url
+        self._cache: dict[tuple[str, str], tuple[EncryptedFile, float]] = {}
+        self._locks: dict[tuple[str, str], tuple[asyncio.Lock, int]] = {}
+
+    async def async_upload(
+        self, source: str, *, is_camera: bool
+    ) -> EncryptedFile | None:
+        """Encrypt and upload a camera snapshot or local file.
+
+        `source` is a camera entity ID if `is_camera` is set, otherwise a path
+        Home Assistant is allowed to read. Returns None if the attachment
+        could not be sent.
+        """
+        server_url = self.server_url
+        if not server_url:
+            _LOGGER.warning("No Blossom server configured, cannot send attachment %s", source)
+            return None
+
+        temp_path = None
+        try:
+            if is_camera:
+                from homeassistant.components.camera import async_get_image
+
+                image = await async_get_image(self._hass, source)
+                temp_path = await self._hass.async_add_executor_job(
+                    _write_temp_file, image.content
+                )
+                path = temp_path
+                mime_type = image.content_type
+            else:
+                if not self._hass.config.is_allowed_path(source):
+                    _LOGGER.warning("Attachment path %s is not in allowlist_external_dirs", source)
+                    return None
+                path = source
+                mime_type = mimetypes.guess_type(source)[0] or "application/octet-stream"
+
+            original_sha256 = await self._hass.async_add_executor_job(_hash_file, path)
+
+            # Concurrent sends of the same content to the same server share
+            # one upload; the lock is dropped once its last user is done
+            key = (server_url, original_sha256)
+            lock, users = self._locks.get(key, (asyncio.Lock(), 0))
+            self._locks[key] = (lock, users + 1)
+            try:
+                async with lock:
+                    cached = self._cache.get(key)
+                    if cached is not None and time.time() < cached[1]:
+                        _LOGGER.debug("Using cached upload for attachment %s", original_sha256)
+                        return cached[0]
+
+                    encrypted = await self._async_encrypt_and_upload(
+                        server_url, path, original_sha256, mime_type
+                    )
+                    if encrypted is not None:
+                        self._prune_cache()
+                        self._cache[key] = (
+                            encrypted,
+                            time.time() + ATTACHMENT_CACHE_TTL_SEC,
+                        )
+                    return encrypted
+            finally:
+                lock, users = self._locks[key]
+                if users > 1:
+                    self._locks[key] = (lock, users - 1)
+                else:
+                    del self._locks[key]
+        except Exception as e:
+            _LOGGER.warning("Failed to prepare attachment %s: %s", source, e)
+            return None
+        finally:
+            if temp_path is not None:
+                await self._hass.async_add_executor_job(_remove_file, temp_path)
+
+    def _prune_cache(self) -> None:
+        """Drop expired uploads from the cache."""
+        now = time.time()
+        for key, (_, expiry) in list(self._cache.items()):
+            if now >= expiry:
+                del self._cache[key]
+
+    async def _async_encrypt_and_upload(
+        self, server_url: str, path: str, original_sha256: str, mime_type: str
+    ) -> EncryptedFile | None:
+        """Encrypt a file with a fresh key and upload the ciphertext."""
+        key = secrets.token_bytes(AES_KEY_SIZE)
+        nonce = secrets.token_bytes(AES_GCM_NONCE_SIZE)
+        encrypted_path, sha256, size = await self._hass.async_add_executor_job(
+            _encrypt_file, path, key, nonce
+        )
+        try:
+            url = await self._async_put_blob(server_url, encrypted_path, sha256, size)
+        finally:
+            await self._hass.async_add_executor_job(_remove_file, encrypted_path)
+
+        if url is None:
+            return None
+
+        _LOGGER.debug("Uploaded attachment %s (%d bytes) to %s", sha256, size, url)
+        return EncryptedFile(
+            url=url,
+            sha256=sha256,
+            original_sha256=original_sha256,
+            size=size,
+            mime_type=mime_type,
+            key_hex=key.hex(),
+            nonce_hex=nonce.hex(),
+        )
+
+    async def _async_put_blob(
+        self, server_url: str, path: str, sha256: str, size: int
+    ) -> str | None:
+        """Upload an encrypted file to the Blossom server, returning its URL."""
+        from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+        blob = await self._hass.async_add_executor_job(open, path, "rb")
+        try:
+            return await async_put_blob(
+                async_get_clientsession(self._hass),
+                server_url,
+                build_blossom_auth(self._private_key_hex, sha256),
+                blob,
+                sha256,
+                size,
+            )
+        finally:
+            await self._hass.async_add_executor_job(blob.close)
@@ -0,0 +1,148 @@
+"""Broadcast one notification to several topics with a shared fan-out."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components.notify import ATTR_DATA, ATTR_MESSAGE, ATTR_TITLE
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .attachment import AttachmentUploader, EncryptedFile
+from .const import (
+    ATTR_FILE,
+    ATTR_IMAGE,
+    CONF_PRIVATE_KEY,
+    CONF_RECIPIENTS,
+    CONF_TOPIC_NAME,
+    DOMAIN,
+)
+from .lifecycle import NostrLifecycle
+from .util import format_message
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BROADCAST = "broadcast"
+
+BROADCAST_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Required(ATTR_MESSAGE): cv.string,
+        vol.Optional(ATTR_TITLE): cv.string,
+        vol.Optional(ATTR_DATA): vol.Schema(
+            {
+                vol.Optional("subject"): cv.string,
+                vol.Exclusive(ATTR_IMAGE, "source"): cv.entity_domain("camera"),
+                vol.Exclusive(ATTR_FILE, "source"): cv.string,
+            },
+            extra=vol.ALLOW_EXTRA,
+        ),
+    }
+)
+
+
+def _get_topics(hass: HomeAssistant, entity_ids: list[str]) -> list[dict[str, Any]]:
+    """Return the entry data of the topics behind the given notify entities."""
+    topics_by_entity = {
+        entry_data["entity"].entity_id: entry_data
+        for entry_data in hass.data.get(DOMAIN, {}).values()
+        if entry_data.get("entity") is not None
+    }
+
+    unknown = [entity_id for entity_id in entity_ids if entity_id not in topics_by_entity]
+    if unknown:
+        raise ServiceValidationError(
+            f"Not Nostr notifier topics: {', '.join(unknown)}"
+        )
+
+    # A topic listed twice is only notified once
+    return list({entity_id: topics_by_entity[entity_id] for entity_id in entity_ids}.values())
+
+
+async def async_handle_broadcast(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Send one message to several topics as a single fan-out.
+
+    Relays are resolved once for the union of all topics' recipients. One
+    topic's client then connects once to the union of their relays and sends
+    every topic's gift wraps, each signed with that topic's own key.
+    """
+    topics = []
+    for topic in _get_topics(hass, call.data[ATTR_ENTITY_ID]):
+        if topic["lifecycle"].closing:
+            _LOGGER.warning(
+                "Dropping broadcast for topic %s, it is shutting down", topic[CONF_TOPIC_NAME]
+            )
+        else:
+            topics.append(topic)
+    if not topics:
+        return
+
+    data = call.data.get(ATTR_DATA) or {}
+    subject = data.get("subject") or call.data.get(ATTR_TITLE)
+    message = format_message(call.data[ATTR_MESSAGE], subject)
+
+    recipients: dict[str, None] = {}
+    for topic in topics:
+        recipients.update(dict.fromkeys(topic[CONF_RECIPIENTS]))
+    if not recipients:
+        _LOGGER.debug("No recipients in broadcast topics, nothing to send")
+        return
+
+    # The first topic's client resolves and sends for all of them; its
+    # lifecycle tracks both so unload can drain or cancel them
+    owner: NostrLifecycle = topics[0]["lifecycle"]
+    recipient_relays = await owner.async_run_delivery(
+        owner.client.resolve_recipients_relays(list(recipients))
+    )
+    if recipient_relays is None:
+        return
+    _LOGGER.debug(
+        "Broadcasting to %d topic(s) with %d distinct recipient(s)",
+        len(topics),
+        len(recipients),
+    )
+
+    # Later notifications through each topic can skip discovery too; entries
+    # keep the age they had when resolved, not a fresh TTL
+    for topic in topics[1:]:
+        topic["lifecycle"].client.seed_relay_cache(
+            {r: recipient_relays[r] for r in topic[CONF_RECIPIENTS]}
+        )
+
+    # Upload an attachment once; every topic references the same blob
+    file: EncryptedFile | None = None
+    if ATTR_IMAGE in data or ATTR_FILE in data:
+        is_camera = ATTR_IMAGE in data
+        # Any topic with a Blossom server can host the shared upload
+        uploader: AttachmentUploader = next(
+            (topic["uploader"] for topic in topics if topic["uploader"].server_url),
+            topics[0]["uploader"],
+        )
+        file = await uploader.async_upload(
+            data[ATTR_IMAGE] if is_camera else data[ATTR_FILE], is_camera=is_camera
+        )
+
+    plans = [
+        (
+            topic["entry"].data[CONF_PRIVATE_KEY],
+            {r: recipient_relays[r][0] for r in topic[CONF_RECIPIENTS]},
+        )
+        for topic in topics
+    ]
+    results = await owner.async_run_delivery(
+        owner.client.deliver_broadcast(plans, message, file)
+    )
+    if results is None:
+        return
+
+    for topic, topic_results in zip(topics, results):
+        _LOGGER.debug(
+            "Broadcast delivered for topic %s to %d/%d recipients",
+            topic[CONF_TOPIC_NAME],
+            sum(topic_results.values()),
+            len(topic_results),
+        )
@@ -1,7 +1,9 @@
 """Config flow for the Home Assistant Nostr notifier integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from typing import Any
 
 import voluptuous as vol
@@ -9,20 +11,24 @@ import voluptuous as vol
 from homeassistant.config_entries import (
     ConfigEntry,
     ConfigFlow,
-    OptionsFlowWithReload,
+    OptionsFlow,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 
 from .const import (
+    CONF_BLOSSOM_SERVER,
+    CONF_ISOLATED_WORKER,
     CONF_PRIVATE_KEY,
+    CONF_RECIPIENT_RELAYS,
     CONF_RECIPIENTS,
     CONF_TOPIC_NAME,
     CONF_TOPIC_SLUG,
     DOMAIN,
+    FLOW_RELAY_RESOLVE_TIMEOUT_SEC,
 )
-from .nostr_client import decode_npub_to_hex, generate_nostr_keypair
-from .util import generate_topic_slug, parse_recipients
+from .nostr_client import NostrClient, decode_npub_to_hex, generate_nostr_keypair
+from .util import generate_topic_slug, is_valid_http_url, parse_recipients
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,16 +49,75 @@ def get_existing_slugs(hass: HomeAssistant) -> list[str]:
     return slugs
 
 
+async def resolve_recipient_relays(
+    private_key_hex: str, recipients_hex: list[str]
+) -> tuple[dict[str, list[str]], list[str]]:
+    """Resolve recipients' inbox relays in one batched, time-bounded step.
+
+    Returns the discovered relays per recipient (recipients without any are
+    omitted) and the recipients that have no reachable inbox relay. If only
+    the reachability probe runs out of time, the discovered relays are still
+    returned and only recipients without any relay count as unreachable.
+    """
+    if not recipients_hex:
+        return {}, []
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + FLOW_RELAY_RESOLVE_TIMEOUT_SEC
+    client = NostrClient(private_key_hex)
+    try:
+        try:
+            discovered = await asyncio.wait_for(
+                client.discover_recipients_relays(recipients_hex),
+                timeout=FLOW_RELAY_RESOLVE_TIMEOUT_SEC,
+            )
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "Timed out discovering inbox relays for %d recipient(s)", len(recipients_hex)
+            )
+            return {}, list(recipients_hex)
+
+        found = {r: relays for r, relays in discovered.items() if relays}
+        unreachable = [r for r in recipients_hex if r not in found]
+
+        try:
+            reachable = await asyncio.wait_for(
+                client.probe_relays([relay for relays in found.values() for relay in relays]),
+                timeout=max(deadline - loop.time(), 0),
+            )
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out checking inbox relay reachability")
+            return found, unreachable
+
+        unreachable.extend(
+            r for r, relays in found.items() if not reachable.intersection(relays)
+        )
+        return found, unreachable
+    finally:
+        await client.close()
+
+
 class HaNostrNotifierConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Nostr notifier."""
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._private_key_hex: str | None = None
+        # Stored form: {"relays": [...], "resolved_at": <unix time>}
+        self._recipient_relays: dict[str, dict[str, Any]] = {}
+        self._resolved: set[str] = set()
+        self._unreachable: set[str] = set()
+        # Recipients the user was already warned about; not looked up again
+        self._warned: set[str] = set()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
         errors = {}
+        placeholders = {"recipients": ""}
 
         if user_input is not None:
             # Validate topic name
@@ -63,6 +128,7 @@ class HaNostrNotifierConfigFlow(ConfigFlow, domain=DOMAIN):
                 # Validate recipients if provided
                 recipients_text = user_input[CONF_RECIPIENTS]
                 recipients_hex = []
+                recipients = []
                 if recipients_text:
                     recipients = parse_recipients(recipients_text)
                     try:
@@ -72,20 +138,65 @@ class HaNostrNotifierConfigFlow(ConfigFlow, domain=DOMAIN):
                     except Exception:
                         errors[CONF_RECIPIENTS] = "invalid_npub"
 
+                if not errors:
+                    # Generate Nostr keypair (kept if the form is shown again)
+                    if self._private_key_hex is None:
+                        self._private_key_hex, _ = await generate_nostr_keypair()
+
+                    # Resolve inbox relays now so the first notification can publish directly
+                    new_recipients = [
+                        r
+                        for r in recipients_hex
+                        if r not in self._resolved and r not in self._warned
+                    ]
+                    relays, unreachable = await resolve_recipient_relays(
+                        self._private_key_hex, new_recipients
+                    )
+                    resolved_at = time.time()
+                    self._recipient_relays.update(
+                        {
+                            r: {"relays": found, "resolved_at": resolved_at}
+                            for r, found in relays.items()
+                        }
+                    )
+                    # Recipients nothing was found for are retried on the next submit
+                    self._resolved.update(relays)
+                    self._unreachable.difference_update(new_recipients)
+                    self._unreachable.update(unreachable)
+
+                    # Warn once about recipients without reachable inbox relays;
+                    # submitting again saves without another lookup
+                    unreachable = self._unreachable.intersection(recipients_hex)
+                    if unreachable - self._warned:
+                        self._warned.update(unreachable)
+                        npubs = [
+                            npub
+                            for npub, r in zip(recipients, recipients_hex)
+                            if r in unreachable
+                        ]
+                        _LOGGER.warning(
+                            "Recipients without reachable inbox relays: %s",
+                            ", ".join(npubs),
+                        )
+                        placeholders["recipients"] = ", ".join(npubs)
+                        errors[CONF_RECIPIENTS] = "no_inbox_relays"
+
                 if not errors:
                     # Generate stable slug
                     existing_slugs = get_existing_slugs(self.hass)
                     slug = generate_topic_slug(topic_name, existing_slugs)
 
-                    # Generate Nostr keypair
-                    private_key_hex, public_key_hex = await generate_nostr_keypair()
-
                     # Create config entry
                     data = {
                         CONF_TOPIC_NAME: topic_name,
                         CONF_TOPIC_SLUG: slug,
-                        CONF_PRIVATE_KEY: private_key_hex,
+                        CONF_PRIVATE_KEY: self._private_key_hex,
                         CONF_RECIPIENTS: recipients_hex,
+                        CONF_RECIPIENT_RELAYS: {
+                            r: self._recipient_relays[r]
+                            for r in recipients_hex
+                            if r in self._recipient_relays
+                        },
                     }
 
                     return self.async_create_entry(
@@ -93,29 +204,47 @@ class HaNostrNotifierConfigFlow(ConfigFlow, domain=DOMAIN):
                         data=data,
                     )
 
+        data_schema = STEP_USER_DATA_SCHEMA
+        if user_input is not None:
+            data_schema = self.add_suggested_values_to_schema(data_schema, user_input)
+
         return self.async_show_form(
             step_id="user",
-            data_schema=STEP_USER_DATA_SCHEMA,
+            data_schema=data_schema,
             errors=errors,
+            description_placeholders=placeholders,
         )
 
     @staticmethod
     @callback
     def async_get_options_flow(
         config_entry: ConfigEntry,
-    ) -> OptionsFlowWithReload:
+    ) -> OptionsFlow:
         """Get the options flow for this handler."""
         return HaNostrNotifierOptionsFlow()
 
 
-class HaNostrNotifierOptionsFlow(OptionsFlowWithReload):
-    """Handle the options flow for editing topic."""
+class HaNostrNotifierOptionsFlow(OptionsFlow):
+    """Handle the options flow for editing topic.
+
+    Changes are hot-applied by the entry's update listener, without a reload.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the options flow."""
+        # Stored form: {"relays": [...], "resolved_at": <unix time>}
+        self._recipient_relays: dict[str, dict[str, Any]] = {}
+        self._resolved: set[str] = set()
+        self._unreachable: set[str] = set()
+        # Recipients the user was already warned about; not looked up again
+        self._warned: set[str] = set()
 
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the options form."""
         errors = {}
+        placeholders = {"recipients": ""}
 
         if user_input is not None:
             # Validate topic name
@@ -126,6 +255,7 @@ class HaNostrNotifierOptionsFlow(OptionsFlowWithReload):
                 # Validate recipients if provided
                 recipients_text = user_input[CONF_RECIPIENTS]
                 recipients_hex = []
+                recipients = []
                 if recipients_text:
                     recipients = parse_recipients(recipients_text)
                     try:
@@ -135,6 +265,61 @@ class HaNostrNotifierOptionsFlow(OptionsFlowWithReload):
                     except Exception:
                         errors[CONF_RECIPIENTS] = "invalid_npub"
 
+                # Validate Blossom server if provided
+                blossom_server = user_input.get(CONF_BLOSSOM_SERVER, "").strip()
+                if blossom_server and not is_valid_http_url(blossom_server):
+                    errors[CONF_BLOSSOM_SERVER] = "invalid_blossom_server"
+
+                if not errors:
+                    current_recipients_hex = self.config_entry.options.get(
+                        CONF_RECIPIENTS,
+                        self.config_entry.data.get(CONF_RECIPIENTS, []),
+                    )
+                    current_relays = self.config_entry.options.get(
+                        CONF_RECIPIENT_RELAYS,
+                        self.config_entry.data.get(CONF_RECIPIENT_RELAYS, {}),
+                    )
+
+                    # Only recipients that are being added need resolving
+                    new_recipients = [
+                        r
+                        for r in recipients_hex
+                        if r not in current_recipients_hex
+                        and r not in self._resolved
+                        and r not in self._warned
+                    ]
+                    relays, unreachable = await resolve_recipient_relays(
+                        self.config_entry.data[CONF_PRIVATE_KEY], new_recipients
+                    )
+                    resolved_at = time.time()
+                    self._recipient_relays.update(
+                        {
+                            r: {"relays": found, "resolved_at": resolved_at}
+                            for r, found in relays.items()
+                        }
+                    )
+                    # Recipients nothing was found for are retried on the next submit
+                    self._resolved.update(relays)
+                    self._unreachable.difference_update(new_recipients)
+                    self._unreachable.update(unreachable)
+
+                    # Warn once about added recipients without reachable inbox relays;
+                    # submitting again saves without another lookup
+                    unreachable = self._unreachable.intersection(recipients_hex)
+                    if unreachable - self._warned:
+                        self._warned.update(unreachable)
+                        npubs = [
+                            npub
+                            for npub, r in zip(recipients, recipients_hex)
+                            if r in unreachable
+                        ]
+                        _LOGGER.warning(
+                            "Recipients without reachable inbox relays: %s",
+                            ", ".join(npubs),
+                        )
+                        placeholders["recipients"] = ", ".join(npubs)
+                        errors[CONF_RECIPIENTS] = "no_inbox_relays"
+
                 if not errors:
                     # Update entry title if topic name changed
                     self.hass.config_entries.async_update_entry(
@@ -145,6 +330,14 @@ class HaNostrNotifierOptionsFlow(OptionsFlowWithReload):
                     options = dict(self.config_entry.options)
                     options[CONF_TOPIC_NAME] = topic_name
                     options[CONF_RECIPIENTS] = recipients_hex
+                    options[CONF_ISOLATED_WORKER] = user_input[CONF_ISOLATED_WORKER]
+                    options[CONF_BLOSSOM_SERVER] = blossom_server
+                    recipient_relays = {**current_relays, **self._recipient_relays}
+                    options[CONF_RECIPIENT_RELAYS] = {
+                        r: recipient_relays[r]
+                        for r in recipients_hex
+                        if r in recipient_relays
+                    }
 
                     return self.async_create_entry(title="", data=options)
 
@@ -173,16 +366,29 @@ class HaNostrNotifierOptionsFlow(OptionsFlowWithReload):
             current_recipients = list(current_recipients_hex)
 
         current_recipients_text = "\n".join(current_recipients)
+        current_isolated_worker = self.config_entry.options.get(CONF_ISOLATED_WORKER, False)
+        current_blossom_server = self.config_entry.options.get(CONF_BLOSSOM_SERVER, "")
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(CONF_TOPIC_NAME, default=current_topic_name): str,
+                vol.Optional(
+                    CONF_RECIPIENTS, default=current_recipients_text
+                ): str,
+                vol.Optional(
+                    CONF_ISOLATED_WORKER, default=current_isolated_worker
+                ): bool,
+                vol.Optional(
+                    CONF_BLOSSOM_SERVER, default=current_blossom_server
+                ): str,
+            }
+        )
+        if user_input is not None:
+            data_schema = self.add_suggested_values_to_schema(data_schema, user_input)
 
         return self.async_show_form(
             step_id="init",
-            data_schema=vol.Schema(
-                {
-                    vol.Required(CONF_TOPIC_NAME, default=current_topic_name): str,
-                    vol.Optional(
-                        CONF_RECIPIENTS, default=current_recipients_text
-                    ): str,
-                }
-            ),
+            data_schema=data_schema,
             errors=errors,
+            description_placeholders=placeholders,
         )
@@ -7,6 +7,12 @@ CONF_TOPIC_NAME = "topic_name"
 CONF_RECIPIENTS = "recipients"
 CONF_TOPIC_SLUG = "topic_slug"
 CONF_PRIVATE_KEY = "private_key"
+CONF_ISOLATED_WORKER = "isolated_worker"
+CONF_RECIPIENT_RELAYS = "recipient_relays"
+CONF_BLOSSOM_SERVER = "blossom_server"
+
+ATTR_IMAGE = "image"
+ATTR_FILE = "file"
 
 DEFAULT_BOOTSTRAP_RELAYS = [
     "wss://nostr.data.haus",
@@ -18,5 +24,22 @@ DEFAULT_BOOTSTRAP_RELAYS = [
 
 DISCOVERY_TIMEOUT_SEC = 10
 PUBLISH_TIMEOUT_SEC = 5
+RELAY_CONNECT_POLL_SEC = 0.1
+FLOW_RELAY_RESOLVE_TIMEOUT_SEC = 30
 
 KIND_10050_RELAY_TAG = "relay"
+
+SHUTDOWN_DRAIN_TIMEOUT_SEC = 10
+DISCONNECT_TIMEOUT_SEC = 5
+
+WORKER_START_TIMEOUT_SEC = 10
+WORKER_STOP_TIMEOUT_SEC = 3
+WORKER_RESTART_DELAY_SEC = 5
+WORKER_RESTART_MAX_DELAY_SEC = 300
+# A worker that exits sooner than this after starting counts as a fast failure
+WORKER_STABLE_SEC = 60
+WORKER_MAX_FAST_FAILURES = 5
+WORKER_REQUEST_TIMEOUT_SEC = 60
+
+UPLOAD_TIMEOUT_SEC = 60
+ATTACHMENT_CACHE_TTL_SEC = 3600
@@ -0,0 +1,120 @@
+"""Lifecycle management for a topic's background tasks and relay connections."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant
+
+from .const import DISCONNECT_TIMEOUT_SEC, SHUTDOWN_DRAIN_TIMEOUT_SEC
+from .nostr_client import NostrClient
+from .worker import NostrWorkerClient
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class NostrLifecycle:
+    """Track a topic's tasks so its client can be torn down deterministically.
+
+    Background tasks (metadata publishing, relay discovery) are cancelled on
+    shutdown. In-flight deliveries are given a bounded drain deadline before
+    being cancelled, after which all relays are disconnected.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: NostrClient | NostrWorkerClient,
+        name: str,
+    ) -> None:
+        """Initialize the lifecycle manager."""
+        self._hass = hass
+        self._client = client
+        self._name = name
+        self._background_tasks: set[asyncio.Task[Any]] = set()
+        self._deliveries: set[asyncio.Task[Any]] = set()
+        self._shutdown_task: asyncio.Task[None] | None = None
+
+    @property
+    def client(self) -> NostrClient | NostrWorkerClient:
+        """Return the managed client."""
+        return self._client
+
+    @property
+    def closing(self) -> bool:
+        """Return True once shutdown has started."""
+        return self._shutdown_task is not None
+
+    def async_create_background_task(
+        self, target: Coroutine[Any, Any, Any], name: str
+    ) -> asyncio.Task[Any] | None:
+        """Start a tracked background task that is cancelled on shutdown."""
+        if self.closing:
+            _LOGGER.debug("Not starting %s, topic %s is shutting down", name, self._name)
+            target.close()
+            return None
+
+        task = self._hass.async_create_background_task(target, name=name)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def async_run_delivery(self, target: Coroutine[Any, Any, _T]) -> _T | None:
+        """Run a delivery so that shutdown can wait for it to finish.
+
+        Returns the delivery's result, or None if the topic is shutting down.
+        """
+        if self.closing:
+            _LOGGER.warning("Dropping notification, topic %s is shutting down", self._name)
+            target.close()
+            return None
+
+        task = asyncio.create_task(target)
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+        # Shield so a cancelled caller does not abort a delivery shutdown is draining
+        return await asyncio.shield(task)
+
+    async def async_shutdown(self) -> None:
+        """Cancel background work, drain deliveries and disconnect all relays.
+
+        Safe to call more than once; later callers wait for the first shutdown.
+        """
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(self._async_shutdown())
+        await asyncio.shield(self._shutdown_task)
+
+    async def _async_shutdown(self) -> None:
+        """Perform the shutdown sequence."""
+        background_tasks = list(self._background_tasks)
+        for task in background_tasks:
+            task.cancel()
+
+        deliveries = list(self._deliveries)
+        if deliveries:
+            _LOGGER.debug(
+                "Draining %d in-flight notification(s) for topic %s",
+                len(deliveries),
+                self._name,
+            )
+            _, pending = await asyncio.wait(deliveries, timeout=SHUTDOWN_DRAIN_TIMEOUT_SEC)
+            if pending:
+                _LOGGER.warning(
+                    "Cancelling %d notification(s) for topic %s still in flight after %ds",
+                    len(pending),
+                    self._name,
+                    SHUTDOWN_DRAIN_TIMEOUT_SEC,
+                )
+                for task in pending:
+                    task.cancel()
+
+        await asyncio.gather(*background_tasks, *deliveries, return_exceptions=True)
+
+        try:
+            await asyncio.wait_for(self._client.close(), timeout=DISCONNECT_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out disconnecting relays for topic %s", self._name)
@@ -5,22 +5,36 @@ import asyncio
 import json
 import logging
 import time
+from collections.abc import Awaitable, Callable, Iterable
 from datetime import timedelta
-from typing import Any
-
-from homeassistant.core import HomeAssistant
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
 from .const import (
     DEFAULT_BOOTSTRAP_RELAYS,
     DISCOVERY_TIMEOUT_SEC,
     PUBLISH_TIMEOUT_SEC,
     KIND_10050_RELAY_TAG,
+    RELAY_CONNECT_POLL_SEC,
 )
+from .util import normalize_relay_url, normalize_relay_urls
+
+if TYPE_CHECKING:
+    from .attachment import EncryptedFile
 
 _LOGGER = logging.getLogger(__name__)
 
 KIND_METADATA = 0
 KIND_INBOX_RELAYS = 10050
+KIND_FILE_MESSAGE = 15
+
+
+@lru_cache(maxsize=1024)
+def parse_relay_url(relay: str) -> Any:
+    """Parse a canonical relay URL into a cached nostr_sdk RelayUrl."""
+    from nostr_sdk import RelayUrl
+
+    return RelayUrl.parse(relay)
 
 
 class NostrClient:
@@ -35,44 +49,87 @@ class NostrClient:
         self._client = Client(self._signer)
         self._relay_cache: dict[str, tuple[list[str], float]] = {}
         self._cache_ttl = 3600.0
+        # Canonical URLs of relays already added to the client
+        self._relays: set[str] = set()
+        # Background refreshes of expired cache entries, keyed by recipient
+        self._refreshing: dict[str, asyncio.Task[None]] = {}
 
     async def close(self) -> None:
         """Disconnect from all relays and cleanup resources."""
+        for task in set(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
         try:
             await self._client.disconnect()
         except Exception as e:
             _LOGGER.debug("Error during client disconnect: %s", e)
 
-    async def _ensure_connected(self) -> None:
-        """Ensure client is connected to bootstrap relays."""
-        from nostr_sdk import RelayUrl
+    async def forget_recipients(self, recipients_hex: list[str]) -> None:
+        """Drop removed recipients and disconnect relays nobody else uses.
+
+        A relay is kept while it is a bootstrap relay or is cached for any
+        remaining recipient.
+        """
+        for recipient_hex in recipients_hex:
+            self._relay_cache.pop(recipient_hex, None)
+            # A refresh still running for them must not re-cache their relays
+            self._refreshing.pop(recipient_hex, None)
 
-        for relay_url_str in DEFAULT_BOOTSTRAP_RELAYS:
+        keep = set(normalize_relay_urls(DEFAULT_BOOTSTRAP_RELAYS))
+        for relays, _ in self._relay_cache.values():
+            keep.update(relays)
+
+        for relay in self._relays - keep:
+            try:
+                await self._client.remove_relay(parse_relay_url(relay))
+            except Exception as e:
+                _LOGGER.debug("Failed to remove relay %s: %s", relay, e)
+                continue
+            self._relays.discard(relay)
+            _LOGGER.debug("Removed unused relay %s", relay)
+
+    async def _add_relays(self, relays: Iterable[str]) -> list[Any]:
+        """Add relays to the client, skipping ones already added.
+
+        Returns the parsed RelayUrl of every valid, distinct relay given.
+        """
+        relay_urls = []
+        for relay in normalize_relay_urls(relays):
+            try:
+                relay_url = parse_relay_url(relay)
+            except Exception as e:
+                _LOGGER.warning("Failed to parse relay URL %s: %s", relay, e)
+                continue
+            relay_urls.append(relay_url)
+
+            if relay in self._relays:
+                continue
             try:
-                relay_url = RelayUrl.parse(relay_url_str)
                 await self._client.add_relay(relay_url)
+                self._relays.add(relay)
             except Exception as e:
-                _LOGGER.warning("Failed to add relay %s: %s", relay_url_str, e)
+                _LOGGER.warning("Failed to add relay %s: %s", relay, e)
 
+        return relay_urls
+
+    async def _ensure_connected(self) -> None:
+        """Ensure client is connected to bootstrap relays."""
         try:
-            await self._client.connect()
-            # Wait for connections to be established
-            await self._client.wait_for_connection(timedelta(seconds=DISCOVERY_TIMEOUT_SEC))
+            await self._connect_relays(DEFAULT_BOOTSTRAP_RELAYS, DISCOVERY_TIMEOUT_SEC)
         except Exception as e:
             _LOGGER.warning("Failed to connect to bootstrap relays: %s", e)
 
     async def _create_discovery_client(self) -> Any:
         """Create a temporary client for discovery (no signer needed)."""
-        from nostr_sdk import Client, RelayUrl
+        from nostr_sdk import Client
 
         client = Client()
 
-        for relay_url_str in DEFAULT_BOOTSTRAP_RELAYS:
+        for relay in normalize_relay_urls(DEFAULT_BOOTSTRAP_RELAYS):
             try:
-                relay_url = RelayUrl.parse(relay_url_str)
-                await client.add_relay(relay_url)
+                await client.add_relay(parse_relay_url(relay))
             except Exception as e:
-                _LOGGER.debug("Failed to add discovery relay %s: %s", relay_url_str, e)
+                _LOGGER.debug("Failed to add discovery relay %s: %s", relay, e)
 
         try:
             await client.connect()
@@ -81,6 +138,13 @@ class NostrClient:
                 client.wait_for_connection(timedelta(seconds=DISCOVERY_TIMEOUT_SEC)),
                 timeout=DISCOVERY_TIMEOUT_SEC + 1.0,
             )
+        except asyncio.CancelledError:
+            # Shutdown cancelled discovery; don't leave the temporary client connected
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+            raise
         except asyncio.TimeoutError:
             _LOGGER.warning("Timed out waiting for discovery relay connections")
             try:
@@ -99,18 +163,23 @@ class NostrClient:
         return client
 
     async def discover_recipient_relays(self, recipient_pubkey_hex: str) -> list[str]:
-        """Discover recipient's messaging relays from kind 10050 with TTL cache."""
+        """Discover recipient's messaging relays from kind 10050 with TTL cache.
+
+        Expired cache entries are still returned and refreshed in the
+        background, so only recipients never resolved wait for discovery.
+        """
         from nostr_sdk import Filter, Kind, PublicKey
 
         # Check cache first
         if recipient_pubkey_hex in self._relay_cache:
             relays, expiry = self._relay_cache[recipient_pubkey_hex]
-            if time.time() < expiry:
-                _LOGGER.debug(
-                    "Using cached relays for recipient %s",
-                    recipient_pubkey_hex,
-                )
-                return relays
+            if time.time() >= expiry:
+                self._refresh_in_background([recipient_pubkey_hex])
+            _LOGGER.debug(
+                "Using cached relays for recipient %s",
+                recipient_pubkey_hex,
+            )
+            return relays
 
         # Try discovery with retry
         max_attempts = 2
@@ -183,16 +252,21 @@ class NostrClient:
             _LOGGER.info("No kind 10050 event found for recipient %s", recipient_pubkey_hex)
             return []
 
+        return self._store_inbox_relays(recipient_pubkey_hex, event)
+
+    def _store_inbox_relays(self, recipient_pubkey_hex: str, event: Any) -> list[str]:
+        """Parse relay tags from a kind 10050 event and cache them."""
         relays = []
 
         try:
             event_json = json.loads(event.as_json())
+            tag_relays = []
             for tag in event_json.get("tags", []):
                 if isinstance(tag, list) and len(tag) > 0:
                     if tag[0] == KIND_10050_RELAY_TAG and len(tag) > 1:
-                        relay = tag[1]
-                        if relay.startswith(("wss://", "ws://")):
-                            relays.append(relay)
+                        if isinstance(tag[1], str):
+                            tag_relays.append(tag[1])
+            relays = normalize_relay_urls(tag_relays)
         except Exception as e:
             _LOGGER.warning("Failed to parse kind 10050 tags: %s", e)
 
@@ -213,6 +287,194 @@ class NostrClient:
 
         return relays
 
+    def seed_relay_cache(
+        self, recipient_relays: dict[str, tuple[list[str], float]]
+    ) -> None:
+        """Seed the relay cache with previously resolved inbox relays.
+
+        Values are `(relays, resolved_at)`. Entries keep only the TTL they have
+        left since they were resolved. Ones older than the TTL are still used,
+        but are refreshed in the background the first time they are needed.
+        """
+        for recipient_hex, (relays, resolved_at) in recipient_relays.items():
+            expiry = resolved_at + self._cache_ttl
+            if relays := normalize_relay_urls(relays):
+                self._relay_cache[recipient_hex] = (relays, expiry)
+
+    async def cached_recipient_relays(
+        self, recipients_hex: list[str]
+    ) -> dict[str, list[str]]:
+        """Return cached inbox relays, expired or not, without discovering.
+
+        Recipients with nothing cached are omitted.
+        """
+        return {
+            r: self._relay_cache[r][0] for r in recipients_hex if r in self._relay_cache
+        }
+
+    async def discover_recipients_relays(
+        self, recipients_hex: list[str]
+    ) -> dict[str, list[str]]:
+        """Discover messaging relays for several recipients with a single query.
+
+        Recipients without a kind 10050 event map to an empty list.
+        """
+        resolved = await self.resolve_recipients_relays(recipients_hex)
+        return {r: relays for r, (relays, _) in resolved.items()}
+
+    async def resolve_recipients_relays(
+        self, recipients_hex: list[str]
+    ) -> dict[str, tuple[list[str], float]]:
+        """Like discover_recipients_relays, but with when each was resolved.
+
+        Values are `(relays, resolved_at)` as accepted by seed_relay_cache, so
+        cached entries passed on to another client keep their original age.
+        Expired cache entries are returned as is and refreshed in the
+        background.
+        """
+        results: dict[str, tuple[list[str], float]] = {}
+        missing = []
+        stale = []
+        now = time.time()
+        for recipient_hex in recipients_hex:
+            cached = self._relay_cache.get(recipient_hex)
+            if cached is None:
+                missing.append(recipient_hex)
+                continue
+            results[recipient_hex] = (cached[0], cached[1] - self._cache_ttl)
+            if now >= cached[1]:
+                stale.append(recipient_hex)
+
+        if stale:
+            self._refresh_in_background(stale)
+
+        if missing:
+            latest = await self._fetch_inbox_relay_events(missing)
+            resolved_at = time.time()
+            for recipient_hex in missing:
+                if (event := latest.get(recipient_hex)) is not None:
+                    results[recipient_hex] = (
+                        self._store_inbox_relays(recipient_hex, event),
+                        resolved_at,
+                    )
+                else:
+                    _LOGGER.info("No kind 10050 event found for recipient %s", recipient_hex)
+
+        return {r: results.get(r, ([], now)) for r in recipients_hex}
+
+    async def _fetch_inbox_relay_events(self, recipients_hex: list[str]) -> dict[str, Any]:
+        """Query kind 10050 for several recipients, returning the newest per author."""
+        from nostr_sdk import Filter, Kind, PublicKey
+
+        client = await self._create_discovery_client()
+        if client is None:
+            return {}
+
+        events = None
+        try:
+            filter_obj = Filter().kind(Kind(KIND_INBOX_RELAYS)).authors(
+                [PublicKey.parse(r) for r in recipients_hex]
+            )
+            events = await asyncio.wait_for(
+                client.fetch_events(filter_obj, timedelta(seconds=DISCOVERY_TIMEOUT_SEC)),
+                timeout=DISCOVERY_TIMEOUT_SEC,
+            )
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "Timed out querying kind 10050 for %d recipient(s)", len(recipients_hex)
+            )
+        except Exception as e:
+            _LOGGER.warning("Failed to query kind 10050: %s", e)
+        finally:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+
+        # Keep only the newest event per author
+        latest: dict[str, Any] = {}
+        if events is not None:
+            for event in events.to_vec():
+                author = event.author().to_hex()
+                current = latest.get(author)
+                if current is None or (
+                    event.created_at().as_secs() > current.created_at().as_secs()
+                ):
+                    latest[author] = event
+        return latest
+
+    def _refresh_in_background(self, recipients_hex: list[str]) -> None:
+        """Re-discover expired cache entries without holding up the caller.
+
+        Recipients already being refreshed are skipped.
+        """
+        recipients_hex = [r for r in recipients_hex if r not in self._refreshing]
+        if not recipients_hex:
+            return
+
+        task = asyncio.get_running_loop().create_task(
+            self._async_refresh(recipients_hex)
+        )
+        for recipient_hex in recipients_hex:
+            self._refreshing[recipient_hex] = task
+
+        def _done(task: asyncio.Task[None]) -> None:
+            for recipient_hex in recipients_hex:
+                if self._refreshing.get(recipient_hex) is task:
+                    del self._refreshing[recipient_hex]
+
+        task.add_done_callback(_done)
+
+    async def _async_refresh(self, recipients_hex: list[str]) -> None:
+        """Refresh cached inbox relays; a failed refresh keeps the old entries."""
+        _LOGGER.debug("Refreshing inbox relays for %d recipient(s)", len(recipients_hex))
+        latest = await self._fetch_inbox_relay_events(recipients_hex)
+        task = asyncio.current_task()
+        for recipient_hex, event in latest.items():
+            # Skip recipients forgotten while the refresh was running
+            if self._refreshing.get(recipient_hex) is task:
+                self._store_inbox_relays(recipient_hex, event)
+
+    async def probe_relays(self, relays: list[str]) -> set[str]:
+        """Return the relays that accept a connection within the discovery timeout."""
+        from nostr_sdk import Client
+
+        relays = normalize_relay_urls(relays)
+        if not relays:
+            return set()
+
+        client = Client()
+        try:
+            for relay in relays:
+                try:
+                    await client.add_relay(parse_relay_url(relay))
+                except Exception as e:
+                    _LOGGER.debug("Failed to add probe relay %s: %s", relay, e)
+
+            await client.connect()
+            try:
+                await asyncio.wait_for(
+                    client.wait_for_connection(timedelta(seconds=DISCOVERY_TIMEOUT_SEC)),
+                    timeout=DISCOVERY_TIMEOUT_SEC + 1.0,
+                )
+            except asyncio.TimeoutError:
+                # Some relays are slow or down; report the ones that did connect
+                pass
+            connected = {
+                normalize_relay_url(str(relay_url))
+                for relay_url, relay in (await client.relays()).items()
+                if relay.is_connected()
+            }
+            return {relay for relay in relays if relay in connected}
+        except Exception as e:
+            _LOGGER.warning("Failed to probe relays: %s", e)
+            return set()
+        finally:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+
     async def publish_metadata_event(
         self,
         topic_name: str,
@@ -222,7 +484,7 @@ class NostrClient:
         """Publish kind 0 metadata event for topic."""
         import json
 
-        from nostr_sdk import Metadata, RelayUrl
+        from nostr_sdk import Metadata
 
         try:
             metadata_json = json.dumps({
@@ -232,20 +494,14 @@ class NostrClient:
             })
             metadata = Metadata.from_json(metadata_json)
             await self._ensure_connected()
-
-            for relay_url_str in target_relays:
-                try:
-                    relay_url = RelayUrl.parse(relay_url_str)
-                    await self._client.add_relay(relay_url)
-                except Exception as e:
-                    _LOGGER.warning("Failed to add metadata relay %s: %s", relay_url_str, e)
+            relay_urls = await self._add_relays(target_relays)
 
             try:
                 await self._client.set_metadata(metadata)
                 _LOGGER.info(
                     "Published metadata for topic %s to %d relay(s)",
                     topic_name,
-                    len(target_relays),
+                    len(relay_urls),
                 )
             except Exception as e:
                 _LOGGER.warning("Failed to publish metadata event: %s", e)
@@ -258,64 +514,309 @@ class NostrClient:
         message: str,
         recipient_relays: list[str],
         timeout_sec: float = PUBLISH_TIMEOUT_SEC,
-    ) -> None:
-        """Send NIP-17 encrypted direct message."""
-        from nostr_sdk import PublicKey, RelayUrl
+    ) -> bool:
+        """Send NIP-17 encrypted direct message.
 
+        Returns True if the message was handed to at least one relay.
+        """
         if not recipient_relays:
             _LOGGER.info(
                 "No messaging relays for recipient %s, skipping DM send",
                 recipient_pubkey_hex,
             )
-            return
+            return False
+
+        try:
+            relay_urls = await self._connect_relays(recipient_relays, timeout_sec)
+        except Exception as e:
+            _LOGGER.warning("Error preparing encrypted DM: %s", e)
+            return False
+        return await self._send_private_msg(
+            recipient_pubkey_hex, message, relay_urls, timeout_sec
+        )
+
+    async def _send_private_msg(
+        self,
+        recipient_pubkey_hex: str,
+        message: str,
+        relay_urls: list[Any],
+        timeout_sec: float,
+    ) -> bool:
+        """Gift-wrap a DM and send it to relays that were already connected."""
+        from nostr_sdk import PublicKey
+
+        if not relay_urls:
+            return False
 
         try:
             recipient_pubkey = PublicKey.parse(recipient_pubkey_hex)
+            output = await asyncio.wait_for(
+                self._client.send_private_msg_to(
+                    relay_urls, recipient_pubkey, message, []
+                ),
+                timeout=timeout_sec,
+            )
+            return _log_send_output("encrypted DM", recipient_pubkey_hex, output)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out sending DM to recipient %s", recipient_pubkey_hex)
+        except Exception as e:
+            _LOGGER.warning("Failed to send DM to recipient %s: %s", recipient_pubkey_hex, e)
+        return False
+
+    async def _connect_relays(
+        self, recipient_relays: list[str], timeout_sec: float
+    ) -> list[Any]:
+        """Add relays to the client and wait until those relays are connected.
+
+        Only the given relays are connected and waited for, so an unreachable
+        relay elsewhere in the shared client does not delay this send.
+        Returns the parsed RelayUrl of every valid relay given.
+        """
+        relay_urls = await self._add_relays(recipient_relays)
+        if not relay_urls:
+            _LOGGER.warning("No valid relay URLs to send to")
+            return []
 
-            relay_urls = []
-            for relay_url_str in recipient_relays:
-                try:
-                    relay_url = RelayUrl.parse(relay_url_str)
-                    relay_urls.append(relay_url)
-                except Exception as e:
-                    _LOGGER.warning("Failed to parse relay URL %s: %s", relay_url_str, e)
+        for relay_url in relay_urls:
+            await self._client.connect_relay(relay_url)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_sec
+        pending = list(relay_urls)
+        while True:
+            relays = await self._client.relays()
+            pending = [
+                relay_url
+                for relay_url in pending
+                if relay_url not in relays or not relays[relay_url].is_connected()
+            ]
+            if not pending or loop.time() >= deadline:
+                break
+            await asyncio.sleep(RELAY_CONNECT_POLL_SEC)
 
-            if not relay_urls:
-                _LOGGER.warning("No valid relay URLs to send to")
-                return
+        if pending:
+            _LOGGER.debug(
+                "%d of %d relay(s) not connected after %ss",
+                len(pending),
+                len(relay_urls),
+                timeout_sec,
+            )
+        return relay_urls
 
-            # Add recipient's relays to the client and connect
-            for relay_url in relay_urls:
-                try:
-                    await self._client.add_relay(relay_url)
-                except Exception as e:
-                    _LOGGER.debug("Failed to add relay %s: %s", relay_url, e)
+    async def send_file_message(
+        self,
+        recipient_pubkey_hex: str,
+        file: EncryptedFile,
+        recipient_relays: list[str],
+        timeout_sec: float = PUBLISH_TIMEOUT_SEC,
+    ) -> bool:
+        """Send a NIP-17 file message (kind 15) referencing an uploaded file.
 
-            await self._client.connect()
-            # Defensive timeout wrapper in case SDK timeout fails
-            await asyncio.wait_for(
-                self._client.wait_for_connection(timedelta(seconds=timeout_sec)),
-                timeout=timeout_sec + 1.0,  # Slightly longer to let SDK timeout trigger first
+        Returns True if the message was handed to at least one relay.
+        """
+        from nostr_sdk import PublicKey
+
+        if not recipient_relays:
+            _LOGGER.info(
+                "No messaging relays for recipient %s, skipping file send",
+                recipient_pubkey_hex,
             )
+            return False
+
+        try:
+            recipient_pubkey = PublicKey.parse(recipient_pubkey_hex)
+            rumor = _build_file_rumor(self._keys.public_key(), recipient_pubkey, file)
+            relay_urls = await self._connect_relays(recipient_relays, timeout_sec)
+            if not relay_urls:
+                return False
 
             try:
-                await asyncio.wait_for(
-                    self._client.send_private_msg_to(
-                        relay_urls, recipient_pubkey, message, []
-                    ),
+                output = await asyncio.wait_for(
+                    self._client.gift_wrap_to(relay_urls, recipient_pubkey, rumor, []),
                     timeout=timeout_sec,
                 )
-                _LOGGER.debug(
-                    "Sent encrypted DM to recipient %s via %d relay(s)",
-                    recipient_pubkey_hex,
-                    len(relay_urls),
+                return _log_send_output("file message", recipient_pubkey_hex, output)
+            except asyncio.TimeoutError:
+                _LOGGER.warning("Timed out sending file to recipient %s", recipient_pubkey_hex)
+            except Exception as e:
+                _LOGGER.warning("Failed to send file to recipient %s: %s", recipient_pubkey_hex, e)
+        except Exception as e:
+            _LOGGER.warning("Error preparing file message: %s", e)
+        return False
+
+    async def deliver_message(
+        self, recipients_hex: list[str], message: str
+    ) -> dict[str, bool]:
+        """Discover relays for and send a DM to each recipient in parallel.
+
+        Returns whether delivery succeeded, keyed by recipient.
+        """
+        results = await asyncio.gather(
+            *(
+                self._deliver_to_recipient(
+                    r, lambda relays, r=r: self.send_encrypted_dm(r, message, relays)
                 )
+                for r in recipients_hex
+            )
+        )
+        return dict(zip(recipients_hex, results))
+
+    async def deliver_broadcast(
+        self,
+        plans: list[tuple[str, dict[str, list[str]]]],
+        message: str,
+        file: EncryptedFile | None = None,
+        timeout_sec: float = PUBLISH_TIMEOUT_SEC,
+    ) -> list[dict[str, bool]]:
+        """Deliver one notification for several topics over this client's relays.
+
+        Each plan is a topic's private key and its recipients' resolved
+        relays. The union of every plan's relays is connected once. Each
+        topic's gift wraps are then signed with that topic's own key and sent
+        over the shared connections, to only the recipient's relays.
+        Recipients without relays are skipped. Returns, per plan, whether the
+        message (and file, if any) reached at least one relay, keyed by
+        recipient.
+        """
+        from nostr_sdk import EventBuilder, Keys, NostrSigner, PublicKey, gift_wrap
+
+        results = [dict.fromkeys(plan, False) for _, plan in plans]
+        all_relays = [
+            relay for _, plan in plans for relays in plan.values() for relay in relays
+        ]
+        if not all_relays:
+            return results
+
+        try:
+            await self._connect_relays(all_relays, timeout_sec)
+        except Exception as e:
+            _LOGGER.warning("Failed to connect to recipient relays: %s", e)
+            return results
+
+        async def _send(keys: Any, signer: Any, recipient_hex: str, relays: list[str]) -> bool:
+            try:
+                receiver = PublicKey.parse(recipient_hex)
+                # Relays are already added, so this only maps them to parsed URLs
+                relay_urls = await self._add_relays(relays)
+                rumors = [
+                    (
+                        "encrypted DM",
+                        EventBuilder.private_msg_rumor(receiver, message).build(
+                            keys.public_key()
+                        ),
+                    )
+                ]
+                if file is not None:
+                    rumors.append(
+                        ("file message", _build_file_rumor(keys.public_key(), receiver, file))
+                    )
+
+                delivered = True
+                for what, rumor in rumors:
+                    event = await gift_wrap(signer, receiver, rumor, [])
+                    output = await asyncio.wait_for(
+                        self._client.send_event_to(relay_urls, event), timeout=timeout_sec
+                    )
+                    delivered = _log_send_output(what, recipient_hex, output) and delivered
+                return delivered
             except asyncio.TimeoutError:
-                _LOGGER.warning("Timed out sending DM to recipient %s", recipient_pubkey_hex)
+                _LOGGER.warning("Timed out sending to recipient %s", recipient_hex)
             except Exception as e:
-                _LOGGER.warning("Failed to send DM to recipient %s: %s", recipient_pubkey_hex, e)
+                _LOGGER.warning("Failed to send to recipient %s: %s", recipient_hex, e)
+            return False
+
+        sends = []
+        targets = []
+        for index, (private_key_hex, plan) in enumerate(plans):
+            keys = Keys.parse(private_key_hex)
+            signer = NostrSigner.keys(keys)
+            for recipient_hex, relays in plan.items():
+                if relays:
+                    sends.append(_send(keys, signer, recipient_hex, relays))
+                    targets.append((index, recipient_hex))
+
+        for (index, recipient_hex), sent in zip(targets, await asyncio.gather(*sends)):
+            results[index][recipient_hex] = sent
+        return results
+
+    async def deliver_file(
+        self, recipients_hex: list[str], file: EncryptedFile
+    ) -> dict[str, bool]:
+        """Discover relays for and send a file message to each recipient in parallel.
+
+        Returns whether delivery succeeded, keyed by recipient.
+        """
+        results = await asyncio.gather(
+            *(
+                self._deliver_to_recipient(
+                    r, lambda relays, r=r: self.send_file_message(r, file, relays)
+                )
+                for r in recipients_hex
+            )
+        )
+        return dict(zip(recipients_hex, results))
+
+    async def _deliver_to_recipient(
+        self,
+        recipient_hex: str,
+        send: Callable[[list[str]], Awaitable[bool]],
+    ) -> bool:
+        """Send to a single recipient."""
+        try:
+            relays = await self.discover_recipient_relays(recipient_hex)
+            if relays:
+                return await send(relays)
         except Exception as e:
-            _LOGGER.warning("Error preparing encrypted DM: %s", e)
+            _LOGGER.warning(
+                "Failed to send to recipient %s: %s",
+                recipient_hex,
+                e,
+            )
+        return False
+
+
+def _build_file_rumor(author: Any, recipient_pubkey: Any, file: EncryptedFile) -> Any:
+    """Build the unsigned NIP-17 file message (kind 15) for one recipient."""
+    from nostr_sdk import EventBuilder, Kind, Tag
+
+    return (
+        EventBuilder(Kind(KIND_FILE_MESSAGE), file.url)
+        .tags(
+            [
+                Tag.public_key(recipient_pubkey),
+                Tag.parse(["file-type", file.mime_type]),
+                Tag.parse(["encryption-algorithm", "aes-gcm"]),
+                Tag.parse(["decryption-key", file.key_hex]),
+                Tag.parse(["decryption-nonce", file.nonce_hex]),
+                Tag.parse(["x", file.sha256]),
+                Tag.parse(["ox", file.original_sha256]),
+                Tag.parse(["size", str(file.size)]),
+            ]
+        )
+        .build(author)
+    )
+
+
+def _log_send_output(what: str, recipient_pubkey_hex: str, output: Any) -> bool:
+    """Log a SendEventOutput and return True if any relay accepted the event."""
+    if output.failed:
+        _LOGGER.debug(
+            "Relays rejected %s to recipient %s: %s",
+            what,
+            recipient_pubkey_hex,
+            output.failed,
+        )
+    if not output.success:
+        _LOGGER.warning("No relay accepted %s to recipient %s", what, recipient_pubkey_hex)
+        return False
+
+    _LOGGER.debug(
+        "Sent %s to recipient %s via %d relay(s)",
+        what,
+        recipient_pubkey_hex,
+        len(output.success),
+    )
+    return True
 
 
 async def generate_nostr_keypair() -> tuple[str, str]:
@@ -1,30 +1,52 @@
 """Notify platform for Nostr notifier."""
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.components.notify import (
+    ATTR_MESSAGE,
+    ATTR_TITLE,
     BaseNotificationService,
     NotifyEntity,
     NotifyEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import (
-    CONF_PRIVATE_KEY,
+    ATTR_FILE,
+    ATTR_IMAGE,
     CONF_RECIPIENTS,
     CONF_TOPIC_NAME,
     CONF_TOPIC_SLUG,
     DOMAIN,
 )
-from .nostr_client import NostrClient
+from .attachment import AttachmentUploader
+from .lifecycle import NostrLifecycle
+from .util import format_message
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICE_SEND_FILE = "send_file"
+
+SEND_FILE_SCHEMA = vol.All(
+    cv.make_entity_service_schema(
+        {
+            vol.Exclusive(ATTR_IMAGE, "source"): cv.entity_domain("camera"),
+            vol.Exclusive(ATTR_FILE, "source"): cv.string,
+            vol.Optional(ATTR_MESSAGE): cv.string,
+            vol.Optional(ATTR_TITLE): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_IMAGE, ATTR_FILE),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -37,7 +59,8 @@ async def async_setup_entry(
         CONF_TOPIC_NAME,
         entry.data.get(CONF_TOPIC_NAME, "Nostr Topic"),
     )
-    private_key = entry.data.get(CONF_PRIVATE_KEY, "")
+    lifecycle: NostrLifecycle = hass.data[DOMAIN][entry.entry_id]["lifecycle"]
+    uploader: AttachmentUploader = hass.data[DOMAIN][entry.entry_id]["uploader"]
     recipients = entry.options.get(
         CONF_RECIPIENTS,
         entry.data.get(CONF_RECIPIENTS, []),
@@ -54,12 +77,19 @@ async def async_setup_entry(
         entry,
         topic_slug,
         topic_name,
-        private_key,
+        lifecycle,
+        uploader,
         recipients,
     )
+    hass.data[DOMAIN][entry.entry_id]["entity"] = entity
 
     async_add_entities([entity])
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SEND_FILE, SEND_FILE_SCHEMA, "async_send_file"
+    )
+
 
 class NostrNotifyEntity(NotifyEntity):
     """Entity for Nostr notifications."""
@@ -71,15 +101,17 @@ class NostrNotifyEntity(NotifyEntity):
         config_entry: ConfigEntry,
         topic_slug: str,
         topic_name: str,
-        private_key: str,
+        lifecycle: NostrLifecycle,
+        uploader: AttachmentUploader,
         recipients: list[str],
     ) -> None:
         """Initialize the entity."""
         self._config_entry = config_entry
         self._topic_slug = topic_slug
         self._topic_name = topic_name
-        self._private_key = private_key
-        self._recipients = recipients
+        self._lifecycle = lifecycle
+        self._uploader = uploader
+        self._recipients = list(recipients)
 
     @property
     def unique_id(self) -> str:
@@ -96,46 +128,90 @@ class NostrNotifyEntity(NotifyEntity):
         """Return False because this entity pushes state."""
         return False
 
+    @callback
+    def async_update_topic(self, topic_name: str, recipients: list[str]) -> None:
+        """Apply a new topic name and recipient list without reloading."""
+        self._topic_name = topic_name
+        self._recipients = list(recipients)
+        if self.hass is not None:
+            self.async_write_ha_state()
+
     async def async_send_message(self, message: str, **kwargs: Any) -> None:
-        """Send a notification message."""
-        client = NostrClient(self._private_key)
-        try:
-            subject = kwargs.get("data", {}).get("subject")
-            if not subject:
-                subject = kwargs.get("title")
-
-            formatted_message = message
-            if subject:
-                formatted_message = f"**{subject}**\n\n{message}"
-
-            _LOGGER.debug(
-                "Sending Nostr notification to %d recipients",
-                len(self._recipients),
-            )
-
-            tasks = []
-            for recipient_hex in self._recipients:
-                task = asyncio.create_task(
-                    self._send_to_recipient(client, recipient_hex, formatted_message)
-                )
-                tasks.append(task)
-
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-        finally:
-            await client.close()
-
-    async def _send_to_recipient(
-        self, client: NostrClient, recipient_hex: str, message: str
+        """Send a notification message.
+
+        The entry's shared client is used so relay connections and the
+        discovery cache survive across notifications and option changes.
+        The delivery is tracked so unload can drain it before disconnecting.
+        """
+        await self._lifecycle.async_run_delivery(self._async_deliver(message, **kwargs))
+
+    async def _async_deliver(self, message: str, **kwargs: Any) -> None:
+        """Deliver a notification to all current recipients."""
+        client = self._lifecycle.client
+        recipients = list(self._recipients)
+        data = kwargs.get("data") or {}
+
+        subject = data.get("subject")
+        if not subject:
+            subject = kwargs.get("title")
+
+        formatted_message = format_message(message, subject)
+
+        _LOGGER.debug(
+            "Sending Nostr notification to %d recipients",
+            len(recipients),
+        )
+
+        if not recipients:
+            return
+
+        results = await client.deliver_message(recipients, formatted_message)
+        _LOGGER.debug(
+            "Delivered Nostr notification to %d/%d recipients",
+            sum(results.values()),
+            len(results),
+        )
+
+    async def async_send_file(
+        self,
+        image: str | None = None,
+        file: str | None = None,
+        message: str | None = None,
+        title: str | None = None,
+    ) -> None:
+        """Send a camera snapshot or local file, with an optional message.
+
+        Handles the send_file entity action; the file goes out as a NIP-17
+        file message after the message, if one is given.
+        """
+        if image is not None:
+            source, is_camera = image, True
+        else:
+            source, is_camera = file, False
+        await self._lifecycle.async_run_delivery(
+            self._async_deliver_file(source, is_camera, message, title)
+        )
+
+    async def _async_deliver_file(
+        self, source: str, is_camera: bool, message: str | None, title: str | None
     ) -> None:
-        """Send to a single recipient."""
-        try:
-            relays = await client.discover_recipient_relays(recipient_hex)
-            if relays:
-                await client.send_encrypted_dm(recipient_hex, message, relays)
-        except Exception as e:
-            _LOGGER.warning(
-                "Failed to send to recipient %s: %s",
-                recipient_hex,
-                e,
-            )
+        """Deliver a file message to all current recipients."""
+        client = self._lifecycle.client
+        recipients = list(self._recipients)
+        if not recipients:
+            return
+
+        if message:
+            await client.deliver_message(recipients, format_message(message, title))
+
+        # Uploaded once and shared by every recipient's gift wrap
+        encrypted = await self._uploader.async_upload(source, is_camera=is_camera)
+        if encrypted is None:
+            return
+        results = await client.deliver_file(recipients, encrypted)
+        _LOGGER.debug(
+            "Delivered attachment %s to %d/%d recipients",
+            encrypted.sha256,
+            sum(results.values()),
+            len(results),
+        )
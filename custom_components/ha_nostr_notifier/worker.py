@@ -0,0 +1,471 @@
+"""Isolated delivery worker process for Nostr relay I/O and crypto.
+
+The worker owns its own event loop and `NostrClient`. Home Assistant talks to
+it through a pair of multiprocessing queues: requests go in as
+``(request_id, op, args)`` tuples and outcomes come back as
+``(request_id, ok, result)`` tuples. `NostrWorkerClient` exposes the same
+coroutine API as `NostrClient`, so callers do not need to know which one
+they hold.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    PUBLISH_TIMEOUT_SEC,
+    WORKER_MAX_FAST_FAILURES,
+    WORKER_REQUEST_TIMEOUT_SEC,
+    WORKER_RESTART_DELAY_SEC,
+    WORKER_RESTART_MAX_DELAY_SEC,
+    WORKER_STABLE_SEC,
+    WORKER_START_TIMEOUT_SEC,
+    WORKER_STOP_TIMEOUT_SEC,
+)
+from .nostr_client import NostrClient
+
+if TYPE_CHECKING:
+    from .attachment import EncryptedFile
+
+_LOGGER = logging.getLogger(__name__)
+
+OP_DELIVER = "deliver"
+OP_DELIVER_FILE = "deliver_file"
+OP_DELIVER_BROADCAST = "deliver_broadcast"
+OP_DISCOVER = "discover"
+OP_DISCOVER_BATCH = "discover_batch"
+OP_RESOLVE_BATCH = "resolve_batch"
+OP_CACHED_RELAYS = "cached_relays"
+OP_PUBLISH_METADATA = "publish_metadata"
+OP_FORGET = "forget"
+OP_SEED = "seed"
+OP_STOP = "stop"
+
+# Seconds between liveness checks while waiting on a queue
+_POLL_INTERVAL_SEC = 1.0
+
+
+class NostrWorkerError(Exception):
+    """Raised when the delivery worker is unavailable or crashed mid-request."""
+
+
+def run_worker(
+    private_key_hex: str,
+    requests: multiprocessing.Queue,
+    responses: multiprocessing.Queue,
+) -> None:
+    """Entry point of the worker process."""
+    asyncio.run(_serve(private_key_hex, requests, responses))
+
+
+async def _serve(
+    private_key_hex: str,
+    requests: multiprocessing.Queue,
+    responses: multiprocessing.Queue,
+) -> None:
+    """Handle requests until told to stop or the parent process goes away."""
+    loop = asyncio.get_running_loop()
+    client = NostrClient(private_key_hex)
+    parent = multiprocessing.parent_process()
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def _handle(request_id: int, op: str, args: tuple[Any, ...]) -> None:
+        try:
+            if op == OP_DELIVER:
+                result: Any = await client.deliver_message(*args)
+            elif op == OP_DELIVER_FILE:
+                result = await client.deliver_file(*args)
+            elif op == OP_DELIVER_BROADCAST:
+                result = await client.deliver_broadcast(*args)
+            elif op == OP_DISCOVER_BATCH:
+                result = await client.discover_recipients_relays(*args)
+            elif op == OP_RESOLVE_BATCH:
+                result = await client.resolve_recipients_relays(*args)
+            elif op == OP_CACHED_RELAYS:
+                result = await client.cached_recipient_relays(*args)
+            elif op == OP_DISCOVER:
+                result = await client.discover_recipient_relays(*args)
+            elif op == OP_PUBLISH_METADATA:
+                result = await client.publish_metadata_event(*args)
+            else:
+                raise ValueError(f"Unknown worker operation: {op}")
+        except Exception as e:
+            responses.put((request_id, False, str(e)))
+        else:
+            responses.put((request_id, True, result))
+
+    def _get_request() -> tuple[int | None, str, tuple[Any, ...]] | None:
+        try:
+            return requests.get(timeout=_POLL_INTERVAL_SEC)
+        except queue.Empty:
+            return None
+
+    try:
+        while True:
+            request = await loop.run_in_executor(None, _get_request)
+            if request is None:
+                if parent is not None and not parent.is_alive():
+                    break
+                continue
+
+            request_id, op, args = request
+            if op == OP_STOP:
+                break
+            if op == OP_FORGET:
+                await client.forget_recipients(*args)
+                continue
+            if op == OP_SEED:
+                client.seed_relay_cache(*args)
+                continue
+
+            task = asyncio.create_task(_handle(request_id, op, args))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await client.close()
+        # Tell the reader thread this was a clean exit
+        responses.put(None)
+
+
+class NostrWorkerClient:
+    """Proxy with the `NostrClient` API that runs requests in a worker process.
+
+    The worker is restarted automatically if it exits unexpectedly, with
+    exponential backoff; requests in flight at the time of a crash fail with
+    `NostrWorkerError`. After repeated fast failures it is not restarted again
+    until the entry is reloaded.
+    """
+
+    def __init__(self, hass: HomeAssistant, private_key_hex: str, name: str) -> None:
+        """Initialize the worker client."""
+        self._hass = hass
+        self._private_key_hex = private_key_hex
+        self._name = name
+        self._context = multiprocessing.get_context("spawn")
+        self._process: Any = None
+        self._requests: multiprocessing.Queue | None = None
+        self._ids = itertools.count()
+        self._pending: dict[int, asyncio.Future[Any]] = {}
+        self._ready = asyncio.Event()
+        self._closing = False
+        self._restart_task: asyncio.Task[None] | None = None
+        self._started_at = 0.0
+        self._fast_failures = 0
+        self._failed = False
+        # Loop time by which a scheduled restart should be running
+        self._restart_deadline: float | None = None
+        # Seeded relays, replayed into a restarted worker
+        self._seed: dict[str, tuple[list[str], float]] = {}
+
+    async def async_start(self) -> None:
+        """Start the worker process."""
+        requests = self._context.Queue()
+        responses = self._context.Queue()
+        process = self._context.Process(
+            target=run_worker,
+            args=(self._private_key_hex, requests, responses),
+            name=f"nostr_worker_{self._name}",
+            daemon=True,
+        )
+        await self._hass.async_add_executor_job(process.start)
+
+        self._process = process
+        self._requests = requests
+        if self._seed:
+            requests.put((None, OP_SEED, (dict(self._seed),)))
+        threading.Thread(
+            target=self._read_responses,
+            args=(process, responses, self._hass.loop),
+            name=f"nostr_worker_reader_{self._name}",
+            daemon=True,
+        ).start()
+        self._started_at = self._hass.loop.time()
+        self._restart_deadline = None
+        self._ready.set()
+        _LOGGER.debug("Started Nostr delivery worker for topic %s (pid %s)", self._name, process.pid)
+
+    def _read_responses(
+        self,
+        process: Any,
+        responses: multiprocessing.Queue,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        """Forward worker responses to the event loop (runs in a thread)."""
+        while True:
+            try:
+                response = responses.get(timeout=_POLL_INTERVAL_SEC)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                response = None
+                crashed = True
+            except (EOFError, OSError):
+                response = None
+                crashed = True
+            else:
+                crashed = False
+
+            if response is None:
+                if crashed or not self._closing:
+                    loop.call_soon_threadsafe(self._handle_worker_exit, process)
+                return
+
+            loop.call_soon_threadsafe(self._resolve, response)
+
+    def _resolve(self, response: tuple[int, bool, Any]) -> None:
+        """Complete the future for a worker response."""
+        request_id, ok, result = response
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(result)
+        else:
+            future.set_exception(NostrWorkerError(result))
+
+    def _handle_worker_exit(self, process: Any) -> None:
+        """Fail in-flight requests and schedule a restart after a crash."""
+        if process is not self._process:
+            return
+
+        self._ready.clear()
+        self._process = None
+        self._requests = None
+
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(NostrWorkerError("Delivery worker exited"))
+        self._pending.clear()
+
+        if self._closing:
+            return
+
+        if self._hass.loop.time() - self._started_at < WORKER_STABLE_SEC:
+            self._fast_failures += 1
+        else:
+            self._fast_failures = 1
+        self._schedule_restart(f"exited (code {process.exitcode})")
+
+    def _schedule_restart(self, reason: str) -> None:
+        """Restart the worker with exponential backoff, or give up."""
+        if self._fast_failures >= WORKER_MAX_FAST_FAILURES:
+            self._failed = True
+            self._restart_deadline = None
+            _LOGGER.error(
+                "Nostr delivery worker for topic %s %s; giving up after %d fast "
+                "failures. Reload the entry to try again",
+                self._name,
+                reason,
+                self._fast_failures,
+            )
+            return
+
+        delay = min(
+            WORKER_RESTART_DELAY_SEC * 2 ** (self._fast_failures - 1),
+            WORKER_RESTART_MAX_DELAY_SEC,
+        )
+        self._restart_deadline = self._hass.loop.time() + delay + WORKER_START_TIMEOUT_SEC
+        _LOGGER.warning(
+            "Nostr delivery worker for topic %s %s, restarting in %ds",
+            self._name,
+            reason,
+            delay,
+        )
+        self._restart_task = self._hass.async_create_background_task(
+            self._async_restart(delay),
+            name=f"nostr_worker_restart_{self._name}",
+        )
+
+    async def _async_restart(self, delay: float) -> None:
+        """Restart the worker after a delay."""
+        await asyncio.sleep(delay)
+        if self._closing:
+            return
+        try:
+            await self.async_start()
+        except Exception as e:
+            self._fast_failures += 1
+            self._schedule_restart(f"failed to start: {e}")
+
+    async def _async_request(self, op: str, *args: Any, timeout: float) -> Any:
+        """Send a request to the worker and wait for its outcome."""
+        if self._closing:
+            raise NostrWorkerError("Delivery worker is shutting down")
+        if self._failed:
+            raise NostrWorkerError("Delivery worker stopped after repeated failures")
+
+        # Wait out a scheduled restart instead of failing during its backoff
+        ready_timeout: float = WORKER_START_TIMEOUT_SEC
+        if self._restart_deadline is not None:
+            ready_timeout = max(
+                ready_timeout, self._restart_deadline - self._hass.loop.time()
+            )
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=ready_timeout)
+        except asyncio.TimeoutError as e:
+            raise NostrWorkerError("Delivery worker is not running") from e
+
+        request_id = next(self._ids)
+        future: asyncio.Future[Any] = self._hass.loop.create_future()
+        self._pending[request_id] = future
+        try:
+            self._requests.put((request_id, op, args))
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError as e:
+            raise NostrWorkerError(f"Delivery worker timed out on {op}") from e
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def forget_recipients(self, recipients_hex: list[str]) -> None:
+        """Drop removed recipients and their unused relays in the worker."""
+        for recipient_hex in recipients_hex:
+            self._seed.pop(recipient_hex, None)
+        if self._requests is not None:
+            self._requests.put((None, OP_FORGET, (list(recipients_hex),)))
+
+    def seed_relay_cache(
+        self, recipient_relays: dict[str, tuple[list[str], float]]
+    ) -> None:
+        """Seed the worker's relay cache with previously resolved inbox relays."""
+        self._seed.update(recipient_relays)
+        if self._requests is not None:
+            self._requests.put((None, OP_SEED, (dict(recipient_relays),)))
+
+    async def discover_recipient_relays(self, recipient_pubkey_hex: str) -> list[str]:
+        """Discover recipient's messaging relays in the worker."""
+        try:
+            return await self._async_request(
+                OP_DISCOVER, recipient_pubkey_hex, timeout=WORKER_REQUEST_TIMEOUT_SEC
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to discover relays for %s: %s", recipient_pubkey_hex, e)
+            return []
+
+    async def discover_recipients_relays(
+        self, recipients_hex: list[str]
+    ) -> dict[str, list[str]]:
+        """Discover messaging relays for several recipients in the worker."""
+        try:
+            return await self._async_request(
+                OP_DISCOVER_BATCH, recipients_hex, timeout=WORKER_REQUEST_TIMEOUT_SEC
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to discover relays for %d recipients: %s", len(recipients_hex), e)
+            return {r: [] for r in recipients_hex}
+
+    async def resolve_recipients_relays(
+        self, recipients_hex: list[str]
+    ) -> dict[str, tuple[list[str], float]]:
+        """Discover messaging relays and when they were resolved in the worker."""
+        try:
+            return await self._async_request(
+                OP_RESOLVE_BATCH, recipients_hex, timeout=WORKER_REQUEST_TIMEOUT_SEC
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to discover relays for %d recipients: %s", len(recipients_hex), e)
+            now = time.time()
+            return {r: ([], now) for r in recipients_hex}
+
+    async def cached_recipient_relays(
+        self, recipients_hex: list[str]
+    ) -> dict[str, list[str]]:
+        """Return the worker's cached inbox relays without discovering."""
+        try:
+            return await self._async_request(
+                OP_CACHED_RELAYS, recipients_hex, timeout=WORKER_REQUEST_TIMEOUT_SEC
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to read cached relays: %s", e)
+            return {}
+
+    async def publish_metadata_event(
+        self,
+        topic_name: str,
+        target_relays: list[str],
+        timeout_sec: float = PUBLISH_TIMEOUT_SEC,
+    ) -> None:
+        """Publish kind 0 metadata event for topic in the worker."""
+        try:
+            await self._async_request(
+                OP_PUBLISH_METADATA,
+                topic_name,
+                target_relays,
+                timeout_sec,
+                timeout=WORKER_REQUEST_TIMEOUT_SEC,
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to publish metadata for topic %s: %s", topic_name, e)
+
+    async def deliver_message(
+        self, recipients_hex: list[str], message: str
+    ) -> dict[str, bool]:
+        """Deliver a DM to each recipient through the worker."""
+        try:
+            return await self._async_request(
+                OP_DELIVER, recipients_hex, message, timeout=WORKER_REQUEST_TIMEOUT_SEC
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to deliver notification for topic %s: %s", self._name, e)
+            return dict.fromkeys(recipients_hex, False)
+
+    async def deliver_broadcast(
+        self,
+        plans: list[tuple[str, dict[str, list[str]]]],
+        message: str,
+        file: EncryptedFile | None = None,
+        timeout_sec: float = PUBLISH_TIMEOUT_SEC,
+    ) -> list[dict[str, bool]]:
+        """Deliver a broadcast for several topics over the worker's relays."""
+        try:
+            return await self._async_request(
+                OP_DELIVER_BROADCAST,
+                plans,
+                message,
+                file,
+                timeout_sec,
+                timeout=WORKER_REQUEST_TIMEOUT_SEC,
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to deliver broadcast through topic %s: %s", self._name, e)
+            return [dict.fromkeys(plan, False) for _, plan in plans]
+
+    async def deliver_file(
+        self, recipients_hex: list[str], file: EncryptedFile
+    ) -> dict[str, bool]:
+        """Deliver a file message to each recipient through the worker."""
+        try:
+            return await self._async_request(
+                OP_DELIVER_FILE, recipients_hex, file, timeout=WORKER_REQUEST_TIMEOUT_SEC
+            )
+        except NostrWorkerError as e:
+            _LOGGER.warning("Failed to deliver attachment for topic %s: %s", self._name, e)
+            return dict.fromkeys(recipients_hex, False)
+
+    async def close(self) -> None:
+        """Stop the worker, letting it disconnect its relays first."""
+        self._closing = True
+        if self._restart_task is not None:
+            self._restart_task.cancel()
+
+        process = self._process
+        if process is None:
+            return
+
+        try:
+            self._requests.put((None, OP_STOP, ()))
+            await self._hass.async_add_executor_job(process.join, WORKER_STOP_TIMEOUT_SEC)
+        finally:
+            if process.is_alive():
+                _LOGGER.debug("Terminating unresponsive Nostr delivery worker for %s", self._name)
+                process.terminate()
+            self._handle_worker_exit(process)
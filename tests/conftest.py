@@ -0,0 +1,24 @@
+"""Test configuration: make the integration's modules importable on their own.
+
+The integration package is registered without running its `__init__`, so
+modules that do not need Home Assistant (e.g. `util`, `attachment`) can be
+tested without it installed.
+"""
+import os
+import sys
+import types
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+if "custom_components.ha_nostr_notifier" not in sys.modules:
+    for name, path in (
+        ("custom_components", os.path.join(ROOT, "custom_components")),
+        (
+            "custom_components.ha_nostr_notifier",
+            os.path.join(ROOT, "custom_components", "ha_nostr_notifier"),
+        ),
+    ):
+        module = types.ModuleType(name)
+        module.__path__ = [path]
+        sys.modules[name] = module
@@ -0,0 +1,113 @@
+"""Tests for attachment encryption and Blossom upload."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+pytest.importorskip("cryptography")
+aiohttp = pytest.importorskip("aiohttp")
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # noqa: E402
+
+from custom_components.ha_nostr_notifier.attachment import (  # noqa: E402
+    AES_GCM_NONCE_SIZE,
+    AES_KEY_SIZE,
+    CHUNK_SIZE,
+    _encrypt_file,
+    async_put_blob,
+)
+
+
+def test_encrypt_file_round_trip(tmp_path):
+    """Encrypted output is ciphertext plus tag and decrypts to the original."""
+    plaintext = os.urandom(CHUNK_SIZE * 2 + 123)
+    source = tmp_path / "snapshot.jpg"
+    source.write_bytes(plaintext)
+    key = os.urandom(AES_KEY_SIZE)
+    nonce = os.urandom(AES_GCM_NONCE_SIZE)
+
+    encrypted_path, sha256, size = _encrypt_file(str(source), key, nonce)
+    try:
+        with open(encrypted_path, "rb") as f:
+            encrypted = f.read()
+    finally:
+        os.unlink(encrypted_path)
+
+    assert size == len(encrypted) == len(plaintext) + 16
+    assert sha256 == hashlib.sha256(encrypted).hexdigest()
+    assert AESGCM(key).decrypt(nonce, encrypted, None) == plaintext
+
+
+def test_put_blob_streams_to_blossom(tmp_path):
+    """The blob is uploaded with auth and the descriptor URL is returned."""
+    content = os.urandom(CHUNK_SIZE + 7)
+    blob_path = tmp_path / "blob"
+    blob_path.write_bytes(content)
+    sha256 = hashlib.sha256(content).hexdigest()
+    received: dict = {}
+
+    async def handle_upload(request: web.Request) -> web.Response:
+        received["auth"] = request.headers.get("Authorization")
+        received["body"] = await request.read()
+        digest = hashlib.sha256(received["body"]).hexdigest()
+        return web.json_response(
+            {"url": f"https://cdn.example/{digest}", "sha256": digest, "size": len(received["body"])}
+        )
+
+    async def run() -> tuple[str | None, str | None]:
+        app = web.Application()
+        app.router.add_put("/upload", handle_upload)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            server_url = str(server.make_url("/"))
+            async with aiohttp.ClientSession() as session:
+                with open(blob_path, "rb") as blob:
+                    url = await async_put_blob(
+                        session, server_url, "Nostr token", blob, sha256, len(content)
+                    )
+                with open(blob_path, "rb") as blob:
+                    mismatch = await async_put_blob(
+                        session, server_url, "Nostr token", blob, "00" * 32, len(content)
+                    )
+            return url, mismatch
+        finally:
+            await server.close()
+
+    url, mismatch = asyncio.run(run())
+
+    assert url == f"https://cdn.example/{sha256}"
+    assert received["auth"] == "Nostr token"
+    assert received["body"] == content
+    assert mismatch is None
+
+
+def test_put_blob_rejected(tmp_path):
+    """An HTTP error from the server yields no URL."""
+    blob_path = tmp_path / "blob"
+    blob_path.write_bytes(b"data")
+
+    async def handle_upload(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(status=401, headers={"X-Reason": "unauthorized"})
+
+    async def run() -> str | None:
+        app = web.Application()
+        app.router.add_put("/upload", handle_upload)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with aiohttp.ClientSession() as session:
+                with open(blob_path, "rb") as blob:
+                    return await async_put_blob(
+                        session, str(server.make_url("/")), "Nostr token", blob, "ab" * 32, 4
+                    )
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,204 @@
+"""Tests for the Nostr client's relay connection handling."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("nostr_sdk")
+pytest.importorskip("aiohttp")
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from nostr_sdk import (  # noqa: E402
+    Event,
+    EventBuilder,
+    Keys,
+    Kind,
+    NostrSigner,
+    Tag,
+    UnwrappedGift,
+)
+
+from custom_components.ha_nostr_notifier.attachment import EncryptedFile  # noqa: E402
+from custom_components.ha_nostr_notifier.nostr_client import (  # noqa: E402
+    KIND_FILE_MESSAGE,
+    KIND_INBOX_RELAYS,
+    NostrClient,
+)
+
+PRIVATE_KEY_HEX = "11" * 32
+
+
+async def _start_relay(
+    events: list[str] | None = None, connections: list[int] | None = None
+) -> TestServer:
+    """Start a local relay that records and accepts every published event."""
+
+    async def handle(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        if connections is not None:
+            connections.append(1)
+        async for msg in ws:
+            payload = json.loads(msg.data)
+            if payload[0] == "EVENT":
+                if events is not None:
+                    events.append(json.dumps(payload[1]))
+                await ws.send_json(["OK", payload[1]["id"], True, ""])
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def _start_black_hole() -> tuple[asyncio.AbstractServer, int]:
+    """Start a TCP listener that never completes a WebSocket handshake."""
+    writers: list[asyncio.StreamWriter] = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writers.append(writer)
+        await reader.read()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_connect_relays_waits_only_for_target_relays() -> None:
+    """An unresponsive relay elsewhere in the pool does not delay a send."""
+
+    async def run() -> tuple[float, bool]:
+        relay = await _start_relay()
+        black_hole, port = await _start_black_hole()
+        client = NostrClient(PRIVATE_KEY_HEX)
+        try:
+            # The unresponsive relay is already part of the shared client
+            await client._add_relays([f"ws://127.0.0.1:{port}"])
+            await client._client.connect()
+
+            target = f"ws://127.0.0.1:{relay.port}"
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            relay_urls = await client._connect_relays([target], timeout_sec=5)
+            elapsed = loop.time() - start
+
+            relays = await client._client.relays()
+            return elapsed, relays[relay_urls[0]].is_connected()
+        finally:
+            await client.close()
+            black_hole.close()
+            await relay.close()
+
+    elapsed, connected = asyncio.run(run())
+
+    assert connected
+    assert elapsed < 2
+
+
+def test_expired_seed_is_used_and_refreshed() -> None:
+    """Stored relays older than the TTL are sent to while being re-discovered."""
+    recipient = Keys.generate()
+    recipient_hex = recipient.public_key().to_hex()
+    inbox_event = (
+        EventBuilder(Kind(KIND_INBOX_RELAYS), "")
+        .tags([Tag.parse(["relay", "wss://new.example.com"])])
+        .sign_with_keys(recipient)
+    )
+
+    async def run() -> tuple[list[str], list[str], list[list[str]]]:
+        client = NostrClient(PRIVATE_KEY_HEX)
+        fetched: list[list[str]] = []
+
+        async def fetch(recipients_hex: list[str]) -> dict:
+            fetched.append(recipients_hex)
+            return {recipient_hex: inbox_event}
+
+        client._fetch_inbox_relay_events = fetch
+        client.seed_relay_cache(
+            {recipient_hex: (["wss://old.example.com"], time.time() - 2 * 3600)}
+        )
+
+        stale = await client.discover_recipient_relays(recipient_hex)
+        await asyncio.gather(*client._refreshing.values())
+        fresh = await client.discover_recipient_relays(recipient_hex)
+        return stale, fresh, fetched
+
+    stale, fresh, fetched = asyncio.run(run())
+
+    assert stale == ["wss://old.example.com"]
+    assert fresh == ["wss://new.example.com"]
+    assert fetched == [[recipient_hex]]
+
+
+def test_broadcast_shares_one_connection_and_signs_per_topic() -> None:
+    """Every topic's wraps go over one connection, each sealed by its topic."""
+    file = EncryptedFile(
+        url="https://cdn.example/" + "ab" * 32,
+        sha256="ab" * 32,
+        original_sha256="cd" * 32,
+        size=1024,
+        mime_type="image/jpeg",
+        key_hex="00" * 32,
+        nonce_hex="00" * 12,
+    )
+    topics = [Keys.generate(), Keys.generate()]
+    recipients = [Keys.generate(), Keys.generate()]
+    events: list[str] = []
+    connections: list[int] = []
+
+    async def run() -> tuple[list[dict[str, bool]], list[tuple[str, str, int]]]:
+        relay = await _start_relay(events, connections)
+        client = NostrClient(topics[0].secret_key().to_hex())
+        try:
+            relays = [f"ws://127.0.0.1:{relay.port}"]
+            plans = [
+                (
+                    topic.secret_key().to_hex(),
+                    {r.public_key().to_hex(): relays for r in recipients},
+                )
+                for topic in topics
+            ]
+            # A recipient without relays is skipped
+            plans[1][1]["ff" * 32] = []
+            results = await client.deliver_broadcast(plans, "hello", file, timeout_sec=5)
+        finally:
+            await client.close()
+            await relay.close()
+
+        unwrapped = []
+        for event_json in events:
+            event = Event.from_json(event_json)
+            for recipient in recipients:
+                try:
+                    gift = await UnwrappedGift.from_gift_wrap(NostrSigner.keys(recipient), event)
+                except Exception:
+                    continue
+                unwrapped.append(
+                    (
+                        gift.sender().to_hex(),
+                        recipient.public_key().to_hex(),
+                        gift.rumor().kind().as_u16(),
+                    )
+                )
+        return results, unwrapped
+
+    results, unwrapped = asyncio.run(run())
+
+    assert results[0] == {r.public_key().to_hex(): True for r in recipients}
+    assert results[1] == {
+        **{r.public_key().to_hex(): True for r in recipients},
+        "ff" * 32: False,
+    }
+    assert len(connections) == 1
+    assert sorted(unwrapped) == sorted(
+        (topic.public_key().to_hex(), recipient.public_key().to_hex(), kind)
+        for topic in topics
+        for recipient in recipients
+        for kind in (14, KIND_FILE_MESSAGE)
+    )